@@ -23,6 +23,7 @@ class AssetAdmin(admin.ModelAdmin):
     ordering = ["pk"]
     list_display = ["id", "title", "domain", "short_descr"]
     list_filter = ["domain"]
+    list_select_related = ["domain"]
     inlines = [KeywordsInline]
     list_per_page = 20
 
@@ -1,98 +1,86 @@
+from django.core.exceptions import ValidationError
 from django.core.management.base import BaseCommand
-import requests
-from bs4 import BeautifulSoup
-import re
-import arrow
+from django.db import DatabaseError, transaction
 from catalog.models import Asset, Domain, Keyword
-from django.db.models import Q
-from dotenv import load_dotenv
 from crawlers import crawlers
 
-load_dotenv()
+# Caps the rows per INSERT so an asset with a very long keyword list does
+# not produce one oversized statement.
+KEYWORD_BATCH_SIZE = 250
 
 
 class Command(BaseCommand):
     help = "Load seed metadata assets."
 
     def save_keywords(self, asset, keywords):
-        for w in keywords:
-            keyword = Keyword(word=w, asset_id=asset.id)
-            keyword.save()
-
-    def load_data_dot_gov(self):
+        keywords = Keyword.objects.bulk_create(
+            [Keyword(word=w) for w in dict.fromkeys(keywords)],
+            batch_size=KEYWORD_BATCH_SIZE,
+        )
+        asset.keyword_set.add(*keywords)
+
+    def save_assets(self, assets, domain):
+        # Asset.title is unique, so keep the first record for each title
+        # here rather than letting every repeat fail its own savepoint.
+        # Untitled records all pass through; Postgres allows many NULLs.
+        unique_assets = []
+        seen_titles = set()
+        for a in assets:
+            title = a.get("title")
+            if title:
+                if title in seen_titles:
+                    print(f"Skipping duplicate title: {title}")
+                    continue
+                seen_titles.add(title)
+            unique_assets.append(a)
+
+        # One transaction per source instead of a commit per statement; each
+        # asset gets a savepoint so a bad row is rolled back on its own.
+        with transaction.atomic():
+            for a in unique_assets:
+                try:
+                    with transaction.atomic():
+                        if a["modified"] == "":
+                            modified = None
+                        else:
+                            modified = str(a["modified"])
+                        asset = Asset.objects.update_or_create(
+                            title=a["title"],
+                            description=a["description"],
+                            modified=modified,
+                            metadata_url=a["metadata_url"],
+                            domain_id=domain.id,
+                        )
+
+                        if a["keywords"]:
+                            self.save_keywords(asset[0], a["keywords"])
+
+                except (KeyError, ValidationError, DatabaseError) as e:
+                    print(e)
+
+    def load_data_dot_gov(self, assets=None):
         print("Loading metadata from data.gov.")
-        assets = crawlers.data_dot_gov()
+        if assets is None:
+            assets = crawlers.data_dot_gov()
 
         domain = Domain.objects.get(pk=1)
-        for a in assets[:]:
-            asset = Asset.objects.update_or_create(
-                title=a["title"],
-                description=a["description"],
-                modified=str(a["modified"]),
-                metadata_url=a["metadata_url"],
-                domain_id=domain.id,
-            )
-
-            for kw in a["keywords"]:
-                keyword = Keyword(word=kw)
-                keyword.save()
-                keyword.assets.add(asset[0])
-
-    def load_fsgeodata(self):
+        self.save_assets(assets, domain)
+
+    def load_fsgeodata(self, assets=None):
         print("Loading metadata from fsgeodata.")
+        if assets is None:
+            assets = crawlers.fsgeodata()
 
-        assets = crawlers.fsgeodata()
         domain = Domain.objects.get(pk=2)
+        self.save_assets(assets, domain)
 
-        for a in assets:
-            try:
-                asset = Asset.objects.update_or_create(
-                    title=a["title"],
-                    description=a["description"],
-                    modified=str(a["modified"]),
-                    metadata_url=a["metadata_url"],
-                    domain_id=domain.id,
-                )
-
-                keywords = a["keywords"]
-
-                if keywords:
-                    for kw in keywords:
-                        keyword = Keyword(word=kw)
-                        keyword.save()
-                        keyword.assets.add(asset[0])
-
-            except Exception as e:
-                print(e)
-
-    def load_crv_data(self):
+    def load_crv_data(self, assets=None):
         print("Loading metadata from CRV")
-        assets = crawlers.climate_risk_viewer()
+        if assets is None:
+            assets = crawlers.climate_risk_viewer()
 
         domain = Domain.objects.get(pk=3)
-        for a in assets:
-            try:
-                if a["modified"] == "":
-                    modified = None
-                else:
-                    modified = str(a["modified"])
-                asset = Asset.objects.update_or_create(
-                    title=a["title"],
-                    description=a["description"],
-                    modified=modified,
-                    metadata_url=a["metadata_url"],
-                    domain_id=domain.id,
-                )
-
-                keywords = a["keywords"]
-                if keywords:
-                    for kw in keywords:
-                        keyword = Keyword(word=kw)
-                        keyword.save()
-                        keyword.assets.add(asset[0])
-
-            except Exception as e:
-                print(e)
+        self.save_assets(assets, domain)
 
     def add_arguments(self, parser):
         parser.add_argument("--src", nargs="+", type=str)
@@ -106,6 +94,12 @@ class Command(BaseCommand):
             elif options["src"][0] == "crv":
                 self.load_crv_data()
             elif options["src"][0] == "all":
-                self.load_data_dot_gov()
-                self.load_fsgeodata()
-                self.load_crv_data()
+                data_dot_gov, fsgeodata, crv = crawlers.crawl_all()
+                # A source whose crawl failed comes back as None; skip it
+                # rather than letting it block the sources that succeeded.
+                if data_dot_gov is not None:
+                    self.load_data_dot_gov(data_dot_gov)
+                if fsgeodata is not None:
+                    self.load_fsgeodata(fsgeodata)
+                if crv is not None:
+                    self.load_crv_data(crv)
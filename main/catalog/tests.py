@@ -1,5 +1,30 @@
+from unittest import mock
+import arrow
 from django.test import TestCase
 from django.test import Client
+from crawlers import crawlers
+from crawlers.crawlers import remove_html
+
+FGDC_METADATA = """<?xml version="1.0" encoding="UTF-8"?>
+<metadata>
+  <idinfo>
+    <citation>
+      <citeinfo>
+        {pubdate}
+        <title>Roads &amp;
+ Trails</title>
+      </citeinfo>
+    </citation>
+    <descript>
+      <abstract>Forest &lt;b&gt;road&lt;/b&gt;
+network</abstract>
+    </descript>
+    <keywords>
+      <theme><themekey>roads</themekey><themekey>trails</themekey></theme>
+    </keywords>
+  </idinfo>
+</metadata>
+"""
 
 
 def test_landing_page():
@@ -7,3 +32,48 @@ def test_landing_page():
     c = Client()
     response = c.get("/")
     assert response.status_code in [301, 302, 308]
+
+
+def test_remove_html():
+    """Test that tags and newlines are stripped from crawled text."""
+    assert remove_html("<p>Forest\n<b>roads</b></p>") == "Forestroads"
+    assert remove_html("Forest\nroads") == "Forestroads"
+    assert remove_html(None) == ""
+
+
+def fsgeodata_asset_from(pubdate, status_code=200):
+    resp = mock.Mock(
+        status_code=status_code,
+        content=FGDC_METADATA.format(pubdate=pubdate).encode(),
+    )
+    with mock.patch.object(crawlers.session, "get", return_value=resp) as get:
+        asset = crawlers.fsgeodata_asset("metadata/roads.xml")
+    get.assert_called_once_with(
+        "https://data.fs.usda.gov/geodata/edw/metadata/roads.xml",
+        timeout=crawlers.CRAWLER_TIMEOUT,
+    )
+    return asset
+
+
+def test_fsgeodata_asset():
+    """Test that the FGDC fields are pulled out of a metadata document."""
+    asset = fsgeodata_asset_from("<pubdate>20200115</pubdate>")
+    assert asset["title"] == "Roads & Trails"
+    assert asset["description"] == "Forest roadnetwork"
+    assert asset["keywords"] == ["roads", "trails"]
+    assert asset["modified"] == arrow.get("20200115")
+    assert (
+        asset["metadata_url"]
+        == "https://data.fs.usda.gov/geodata/edw/metadata/roads.xml"
+    )
+
+
+def test_fsgeodata_asset_without_pubdate():
+    """Test that an empty or missing pubdate leaves modified blank."""
+    assert fsgeodata_asset_from("<pubdate></pubdate>")["modified"] == ""
+    assert fsgeodata_asset_from("")["modified"] == ""
+
+
+def test_fsgeodata_asset_skips_http_errors():
+    """Test that a metadata file served with an error status is skipped."""
+    assert fsgeodata_asset_from("", status_code=503) is None
@@ -21,12 +21,16 @@ class AssetSearchResults(ListView, FormMixin):
 
     def get_queryset(self):
         if self.search_term:
-            qs = Asset.objects.filter(
-                Q(title__icontains=self.search_term)
-                | Q(description__icontains=self.search_term)
-            ).order_by("title")
+            qs = (
+                Asset.objects.select_related("domain")
+                .filter(
+                    Q(title__icontains=self.search_term)
+                    | Q(description__icontains=self.search_term)
+                )
+                .order_by("title")
+            )
         else:
-            qs = Asset.objects.all()
+            qs = Asset.objects.select_related("domain").order_by("title")
 
         return qs
 
@@ -38,7 +42,7 @@ class AssetSearchResults(ListView, FormMixin):
                 st = SearchTerm(term=self.search_term)
                 st.save()
 
-        self.object_list = self.get_queryset().order_by("title")
+        self.object_list = self.get_queryset()
         context = self.get_context_data()
 
         return self.render_to_response(context)
@@ -1,13 +1,61 @@
 # from django.core.management.base import BaseCommand
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from lxml import etree, html
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import arrow
-from dotenv import load_dotenv
+
+# The metadata XML downloads are network bound, so they run on threads.
+FSGEODATA_MAX_WORKERS = 16
+
+# Seconds to wait on connect and on each read. Without it a stalled socket
+# never times out, so the retries below never fire and the crawl hangs.
+CRAWLER_TIMEOUT = 30
+
+# Shared across crawlers so repeat requests to the same host reuse
+# keep-alive connections instead of a new TCP/TLS handshake per GET. The
+# pool is sized so every fsgeodata worker can keep its own connection.
+session = requests.Session()
+adapter = HTTPAdapter(
+    pool_maxsize=FSGEODATA_MAX_WORKERS,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        # Hand the last response back instead of raising RetryError; each
+        # crawler checks status_code and skips just the failing URL.
+        raise_on_status=False,
+    ),
+)
+session.mount("https://", adapter)
+session.mount("http://", adapter)
+
+HTML_TAG_PATTERN = re.compile("<[^<]+?>")
+
+# hrefs of the anchors whose whole text is "metadata" on the dataset index.
+METADATA_LINKS = etree.XPath("//a[. = 'metadata']/@href", smart_strings=False)
+
+# lxml parsers must not be shared between threads, so each crawler worker
+# builds one on first use and reuses it for every file it parses.
+parsers = threading.local()
+
+
+def xml_parser():
+    if not hasattr(parsers, "xml"):
+        parsers.xml = etree.XMLParser(resolve_entities=False, no_network=True)
+    return parsers.xml
 
 
 def remove_html(text):
-    txt = re.sub("<[^<]+?>", "", text).replace("\n", "")
+    if not text:
+        return ""
+    if "<" not in text:
+        return text.replace("\n", "")
+
+    txt = HTML_TAG_PATTERN.sub("", text).replace("\n", "")
     return txt
 
 
@@ -32,7 +80,12 @@ def data_dot_gov():
 
     assets = []
     for url in metadata_urls:
-        resp = requests.get(url).json()
+        resp = session.get(url, timeout=CRAWLER_TIMEOUT)
+        if resp.status_code != 200:
+            print(f"Skipping {url}: HTTP {resp.status_code}")
+            continue
+
+        resp = resp.json()
         description = remove_html(resp["description"])
         title = resp["title"]
         modified = arrow.get(resp["modified"])
@@ -51,44 +104,50 @@ def data_dot_gov():
     return assets
 
 
+def fsgeodata_asset(url):
+    url = f"https://data.fs.usda.gov/geodata/edw/{url}"
+    resp = session.get(url, timeout=CRAWLER_TIMEOUT)
+    if resp.status_code != 200:
+        print(f"Skipping {url}: HTTP {resp.status_code}")
+        return None
+
+    tree = etree.fromstring(resp.content, xml_parser())
+    title = remove_html("".join(tree.find(".//title").itertext()))
+    abstract = remove_html("".join(tree.find(".//descript/abstract").itertext()))
+    keywords = ["".join(tk.itertext()) for tk in tree.iter("themekey")]
+    idinfo_citation_citeinfo_pubdate = tree.findtext(".//pubdate")
+    if idinfo_citation_citeinfo_pubdate:
+        modified = arrow.get(idinfo_citation_citeinfo_pubdate)
+    else:
+        modified = ""
+
+    asset = {
+        "title": title,
+        "description": abstract,
+        "modified": modified,
+        "metadata_url": url,
+        "keywords": keywords,
+    }
+
+    return asset
+
+
 def fsgeodata():
     base_url = "https://data.fs.usda.gov/geodata/edw/datasets.php"
-    metadata_urls = []
-    assets = []
 
     # Read the page that has the matedata links and cache locally
-    resp = requests.get(base_url)
-    soup = BeautifulSoup(resp.content, "html.parser")
+    resp = session.get(base_url, timeout=CRAWLER_TIMEOUT)
+    metadata_urls = METADATA_LINKS(html.fromstring(resp.content))
 
-    anchors = soup.find_all("a")
-    for anchor in anchors:
-        if anchor and anchor.get_text() == "metadata":
-            metadata_urls.append(anchor["href"])
+    # The index can link the same metadata file from several rows; only
+    # download and parse each one once.
+    metadata_urls = list(dict.fromkeys(metadata_urls))
 
-    for url in metadata_urls:
-        url = f"https://data.fs.usda.gov/geodata/edw/{url}"
-        resp = requests.get(url)
-        soup = BeautifulSoup(resp.content, features="xml")
-        title = remove_html(soup.find("title").get_text())
-        desc_block = soup.find("descript")
-        abstract = remove_html(desc_block.find("abstract").get_text())
-        themekeys = soup.find_all("themekey")
-        keywords = [tk.get_text() for tk in themekeys]
-        idinfo_citation_citeinfo_pubdate = soup.find("pubdate")
-        if idinfo_citation_citeinfo_pubdate:
-            modified = arrow.get(idinfo_citation_citeinfo_pubdate.get_text())
-        else:
-            modified = ""
+    with ThreadPoolExecutor(max_workers=FSGEODATA_MAX_WORKERS) as executor:
+        assets = list(executor.map(fsgeodata_asset, metadata_urls))
 
-        asset = {
-            "title": title,
-            "description": abstract,
-            "modified": modified,
-            "metadata_url": url,
-            "keywords": keywords,
-        }
-
-        assets.append(asset)
+    # Metadata files that could not be fetched come back as None.
+    assets = [asset for asset in assets if asset is not None]
 
     return assets
 
@@ -105,7 +164,7 @@ def climate_risk_viewer():
     ]
 
     for url in metadata_urls[:]:
-        resp = requests.get(url)
+        resp = session.get(url, timeout=CRAWLER_TIMEOUT)
         if resp.status_code == 200:
             content = resp.json()
             title = None
@@ -113,7 +172,7 @@ def climate_risk_viewer():
             if "documentInfo" in content.keys() and content["documentInfo"]:
                 doc_info = content["documentInfo"]
                 title = doc_info["Title"]
-                keywords = [kw.strip() for kw in doc_info["Keywords"].split(" ")]
+                keywords = doc_info["Keywords"].split()
                 # comments = remove_html(doc_info["Comments"])
 
                 asset = {
@@ -129,12 +188,33 @@ def climate_risk_viewer():
     return assets
 
 
+def crawl_all():
+    # The crawlers hit different hosts and mostly wait on I/O, so run them
+    # side by side; results come back in the order listed here. A crawler
+    # that fails is reported and returns None so the other sources can
+    # still be loaded.
+    crawlers = [data_dot_gov, fsgeodata, climate_risk_viewer]
+    with ThreadPoolExecutor(max_workers=len(crawlers)) as executor:
+        futures = [executor.submit(crawler) for crawler in crawlers]
+
+    results = []
+    for crawler, future in zip(crawlers, futures):
+        try:
+            results.append(future.result())
+        except Exception as e:
+            print(f"{crawler.__name__} failed: {e}")
+            results.append(None)
+
+    return results
+
+
 def main():
     import pprint
 
-    assets = data_dot_gov()
-    assets.extend(fsgeodata())
-    assets.extend(climate_risk_viewer())
+    assets = []
+    for source_assets in crawl_all():
+        if source_assets is not None:
+            assets.extend(source_assets)
 
     pprint.pprint(assets)
 